@@ -0,0 +1,121 @@
+import collections
+import math
+import pickle
+import random
+import re
+import unicodedata
+
+import pandas as pd
+import pytest
+
+from creme import compose
+from creme import feature_extraction as fx
+from creme import preprocessing
+
+
+CORPUS = [
+    'This is the first document.',
+    'This document is the second document.',
+    'And this is the third one.',
+    'Is this the first document?',
+]
+
+
+@pytest.mark.parametrize('vectorizer', [fx.BagOfWords(), fx.TFIDF()], ids=['BagOfWords', 'TFIDF'])
+def test_pipeline_transform_many(vectorizer):
+    """Checks that a vectorizer can be the first step of a mini-batch pipeline."""
+
+    model = compose.Pipeline(vectorizer, preprocessing.StandardScaler())
+    X = model.transform_many(pd.Series(CORPUS))
+
+    assert len(X) == len(CORPUS)
+    assert 'document' in X.columns
+
+
+@pytest.mark.parametrize('on', [None, 'text'])
+def test_tfidf_fit_many_matches_fit_one(on):
+    """Checks that fit_many produces the same document counts as fit_one."""
+
+    one = fx.TFIDF(on=on)
+    many = fx.TFIDF(on=on)
+
+    X = pd.Series(CORPUS) if on is None else pd.DataFrame({on: CORPUS})
+    for x in CORPUS:
+        one.fit_one(x if on is None else {on: x})
+    many.fit_many(X)
+
+    assert one.n == many.n
+    assert one.dfs == many.dfs
+
+    for x in CORPUS:
+        x = x if on is None else {on: x}
+        a = one.transform_one(x)
+        b = many.transform_one(x)
+        assert a.keys() == b.keys()
+        assert all(math.isclose(a[term], b[term]) for term in a)
+
+
+def test_process_text_can_be_overridden():
+    """Checks that a subclass can override process_text."""
+
+    class Splitter(fx.BagOfWords):
+
+        def process_text(self, x):
+            return x.split('-')
+
+    assert Splitter().transform_one('a-b-a') == {'a': 2, 'b': 1}
+
+
+def test_processing_steps_can_be_modified():
+    """Checks that modifying processing_steps after __init__ is taken into account."""
+
+    bow = fx.BagOfWords()
+    assert bow.transform_one('Hello hello') == {'hello': 2}
+
+    bow.processing_steps.append(lambda tokens: [token[::-1] for token in tokens])
+    assert bow.transform_one('Hello hello') == {'olleh': 2}
+
+    bow.processing_steps[:] = [str.split]
+    assert bow.transform_one('Hello hello') == {'Hello': 1, 'hello': 1}
+
+
+def test_pickle():
+    """Checks that a vectorizer can be pickled, even though its processing steps are fused."""
+
+    tfidf = fx.TFIDF(on='text', ngram_range=(1, 2))
+    for x in CORPUS:
+        tfidf.fit_one({'text': x})
+
+    clone = pickle.loads(pickle.dumps(tfidf))
+
+    for x in CORPUS:
+        assert clone.transform_one({'text': x}) == tfidf.transform_one({'text': x})
+
+
+def test_strip_accents_per_word():
+    """Checks that stripping accents word by word produces the same tokens as stripping accents
+    from the whole text."""
+
+    def reference(text):
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+        return collections.Counter(re.findall(r'(?u)\b\w\w+\b', text))
+
+    alphabet = (
+        'abcXYZ019_' +
+        'éèêëÉàÂçÇñøßİıﬁ²½' +  # accents, ligatures, compatibility characters
+        '\u0301\u0327\u20d7' +  # combining characters
+        'αβΩжЖ日本' +
+        ' \t\n\u00a0\u2009.,;!?-\'"'  # whitespace and punctuation
+    )
+    rng = random.Random(42)
+    bow = fx.BagOfWords()
+
+    for _ in range(2000):
+        text = ''.join(rng.choices(alphabet, k=rng.randint(0, 40)))
+        assert bow.transform_one(text) == reference(text), text
+
+    # Without lowercasing
+    bow = fx.BagOfWords(lowercase=False)
+    text = 'Élève  à la Forêt'
+    assert bow.transform_one(text) == {'Eleve': 1, 'la': 1, 'Foret': 1}
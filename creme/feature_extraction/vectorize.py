@@ -7,6 +7,8 @@ import re
 import typing
 import unicodedata
 
+import pandas as pd
+
 from creme import base
 
 
@@ -18,17 +20,96 @@ N_GRAM = typing.Union[
     typing.Tuple[str, ...]  # n-gram
 ]
 
+# The default tokenizer is compiled once and shared by every vectorizer.
+#
+# The tokens are not passed through sys.intern. A str caches its hash, and a dict lookup with an
+# equal but distinct str only costs a short memcmp on top of that. Interning every token adds a
+# lookup in the interned table, which is slower overall than what it saves downstream.
+_DEFAULT_TOKENIZER = re.compile(r'(?u)\b\w\w+\b').findall
+
+
+class _CombiningTable(dict):
+    """Translation table which maps combining characters to `None`.
+
+    The table is meant to be used with `str.translate`. Code points which are not yet in the table
+    are looked up once with `unicodedata.combining` and then cached.
+
+    """
+
+    def __missing__(self, cp):
+        value = None if unicodedata.combining(chr(cp)) else cp
+        self[cp] = value
+        return value
+
+
+_COMBINING_NONE = _CombiningTable(
+    (cp, None)
+    for cp in itertools.chain(
+        range(0x0300, 0x0370),  # Combining Diacritical Marks
+        range(0x1AB0, 0x1B00),  # Combining Diacritical Marks Extended
+        range(0x1DC0, 0x1E00),  # Combining Diacritical Marks Supplement
+        range(0x20D0, 0x2100),  # Combining Diacritical Marks for Symbols
+        range(0xFE20, 0xFE30)  # Combining Half Marks
+    )
+    if unicodedata.combining(chr(cp))
+)
+
 
 def strip_accents_unicode(s: str) -> str:
-    """Transform accentuated unicode symbols into their ASCII counterpart."""
+    """Transform accentuated unicode symbols into their ASCII counterpart.
+
+    Example:
+
+        >>> strip_accents_unicode('élève à la forêt')
+        'eleve a la foret'
+
+        >>> strip_accents_unicode('e\u0301')
+        'e'
+
+    """
     try:
         # If `s` is ASCII-compatible, then it does not contain any accented
-        # characters and we can avoid an expensive list comprehension
+        # characters and is already in NFKD form
         s.encode('ASCII', errors='strict')
         return s
     except UnicodeEncodeError:
-        normalized = unicodedata.normalize('NFKD', s)
-        return ''.join([c for c in normalized if not unicodedata.combining(c)])
+        # str.translate runs in C, which is much faster than filtering in Python
+        return unicodedata.normalize('NFKD', s).translate(_COMBINING_NONE)
+
+
+@functools.lru_cache(maxsize=100_000)
+def _strip_accents_word(word: str) -> str:
+    return strip_accents_unicode(word)
+
+
+@functools.lru_cache(maxsize=100_000)
+def _strip_accents_lower_word(word: str) -> str:
+    return strip_accents_unicode(word).lower()
+
+
+def strip_accents_words(s: str, lowercase: bool) -> str:
+    """Strip accents word by word, and optionally lowercase each word.
+
+    Word frequencies usually follow a Zipfian distribution, hence the result for each word is
+    cached. The words are joined back with single spaces, which is why this function is only meant
+    to be used in front of a tokenizer which ignores whitespace.
+
+    Example:
+
+        >>> strip_accents_words('Élève  à la forêt', lowercase=True)
+        'eleve a la foret'
+
+        >>> strip_accents_words('Élève  à la forêt', lowercase=False)
+        'Eleve a la foret'
+
+    """
+    try:
+        # ASCII text has no accents and is handled in bulk
+        s.encode('ASCII', errors='strict')
+        return s.lower() if lowercase else s
+    except UnicodeEncodeError:
+        normalize = _strip_accents_lower_word if lowercase else _strip_accents_word
+        return ' '.join(map(normalize, s.split()))
 
 
 def find_ngrams(tokens: typing.List[str], n: int) -> typing.Iterator[N_GRAM]:
@@ -58,7 +139,8 @@ def find_ngrams(tokens: typing.List[str], n: int) -> typing.Iterator[N_GRAM]:
     """
     if n == 1:
         return iter(tokens)
-    return zip(*[tokens[i:] for i in range(n)])
+    # islice avoids copying the list of tokens for each offset
+    return zip(*[itertools.islice(tokens, i, None) for i in range(n)])
 
 
 def find_all_ngrams(tokens: typing.List[str], ngram_range: range) -> typing.Iterator[N_GRAM]:
@@ -75,7 +157,33 @@ def find_all_ngrams(tokens: typing.List[str], ngram_range: range) -> typing.Iter
         ['a', 'b', 'c', ('a', 'b'), ('b', 'c'), ('a', 'b', 'c')]
 
     """
-    return itertools.chain(*(find_ngrams(tokens, n) for n in ngram_range))
+    return itertools.chain.from_iterable(find_ngrams(tokens, n) for n in ngram_range)
+
+
+def _compose(funcs: typing.Sequence[typing.Callable]) -> typing.Callable:
+    """Fuses a sequence of functions into a single function.
+
+    The returned function applies each function in turn. The nested calls are generated once so
+    that no loop has to be run each time the returned function is called. The functions are bound
+    as default arguments, which makes them local variables of the generated function.
+
+    Example:
+
+        >>> f = _compose([str.strip, str.lower, str.split])
+        >>> f('  Hello World ')
+        ['hello', 'world']
+
+        >>> _compose([])('unchanged')
+        'unchanged'
+
+    """
+    namespace = {f'f{i}': func for i, func in enumerate(funcs)}
+    args = ''.join(f', {name}={name}' for name in namespace)
+    body = 'x'
+    for name in namespace:
+        body = f'{name}({body})'
+    exec(f'def composed(x{args}):\n    return {body}', namespace)
+    return namespace['composed']
 
 
 class VectorizerMixin:
@@ -108,7 +216,7 @@ class VectorizerMixin:
         self.strip_accents = strip_accents
         self.lowercase = lowercase
         self.preprocessor = preprocessor
-        self.tokenizer = re.compile(r'(?u)\b\w\w+\b').findall if tokenizer is None else tokenizer
+        self.tokenizer = _DEFAULT_TOKENIZER if tokenizer is None else tokenizer
         self.ngram_range = ngram_range
 
         self.processing_steps = []
@@ -120,6 +228,13 @@ class VectorizerMixin:
         # Preprocessing
         if preprocessor is not None:
             self.processing_steps.append(preprocessor)
+        elif self.strip_accents and self.tokenizer == _DEFAULT_TOKENIZER:
+            # The default tokenizer ignores whitespace, hence the text can be normalized word by
+            # word, which allows the result for each word to be cached
+            self.processing_steps.append(functools.partial(
+                strip_accents_words,
+                lowercase=self.lowercase
+            ))
         else:
             if self.strip_accents:
                 self.processing_steps.append(strip_accents_unicode)
@@ -137,10 +252,28 @@ class VectorizerMixin:
                 ngram_range=range(ngram_range[0], ngram_range[1] + 1)
             ))
 
+        # The processing steps are fused into a single function
+        self._fuse()
+
+    def _fuse(self):
+        self._fused_steps = list(self.processing_steps)
+        self._pipeline = _compose(self._fused_steps)
+
     def process_text(self, x):
-        for step in self.processing_steps:
-            x = step(x)
-        return x
+        # The steps are fused again if they have been modified since they were last fused
+        if self.processing_steps != self._fused_steps:
+            self._fuse()
+        return self._pipeline(x)
+
+    def __getstate__(self):
+        # The fused pipeline is generated code, which can't be pickled
+        state = self.__dict__.copy()
+        del state['_pipeline']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._fuse()
 
     def _more_tags(self):
         if self.on is None:
@@ -174,8 +307,8 @@ class BagOfWords(base.Transformer, VectorizerMixin):
     Example:
 
         By default, `BagOfWords` will take as input a sentence, preprocess it, tokenize the
-        preprocessed text, and then return a `collections.Counter` containing the number of
-        occurrences of each token.
+        preprocessed text, and then return a `dict` containing the number of occurrences of each
+        token.
 
         >>> from creme import feature_extraction as fx
 
@@ -190,10 +323,10 @@ class BagOfWords(base.Transformer, VectorizerMixin):
 
         >>> for sentence in corpus:
         ...     print(bow.transform_one(sentence))
-        Counter({'this': 1, 'is': 1, 'the': 1, 'first': 1, 'document': 1})
-        Counter({'document': 2, 'this': 1, 'is': 1, 'the': 1, 'second': 1})
-        Counter({'and': 1, 'this': 1, 'is': 1, 'the': 1, 'third': 1, 'one': 1})
-        Counter({'is': 1, 'this': 1, 'the': 1, 'first': 1, 'document': 1})
+        {'this': 1, 'is': 1, 'the': 1, 'first': 1, 'document': 1}
+        {'this': 1, 'document': 2, 'is': 1, 'the': 1, 'second': 1}
+        {'and': 1, 'this': 1, 'is': 1, 'the': 1, 'third': 1, 'one': 1}
+        {'is': 1, 'this': 1, 'the': 1, 'first': 1, 'document': 1}
 
         Note that `fit_one` does not have to be called because `BagOfWords` is stateless. You can
         call it but it won't do anything.
@@ -206,10 +339,10 @@ class BagOfWords(base.Transformer, VectorizerMixin):
         >>> for sentence in corpus:
         ...     x = {'sentence': sentence}
         ...     print(bow.transform_one(x))
-        Counter({'this': 1, 'is': 1, 'the': 1, 'first': 1, 'document': 1})
-        Counter({'document': 2, 'this': 1, 'is': 1, 'the': 1, 'second': 1})
-        Counter({'and': 1, 'this': 1, 'is': 1, 'the': 1, 'third': 1, 'one': 1})
-        Counter({'is': 1, 'this': 1, 'the': 1, 'first': 1, 'document': 1})
+        {'this': 1, 'is': 1, 'the': 1, 'first': 1, 'document': 1}
+        {'this': 1, 'document': 2, 'is': 1, 'the': 1, 'second': 1}
+        {'and': 1, 'this': 1, 'is': 1, 'the': 1, 'third': 1, 'one': 1}
+        {'is': 1, 'this': 1, 'the': 1, 'first': 1, 'document': 1}
 
         The `ngram_range` parameter can be used to extract n-grams (including unigrams):
 
@@ -233,10 +366,63 @@ class BagOfWords(base.Transformer, VectorizerMixin):
         ('in', 'the') 1
         ('the', 'morning') 1
 
+        A mini-batch of documents can be transformed at once with `transform_many`:
+
+        >>> import pandas as pd
+
+        >>> bow = fx.BagOfWords()
+        >>> bow.transform_many(pd.Series(corpus[:2]))
+           this   is  the  first  document  second
+        0   1.0  1.0  1.0    1.0       1.0     0.0
+        1   1.0  1.0  1.0    0.0       2.0     1.0
+
     """
 
     def transform_one(self, x):
-        return collections.Counter(self.process_text(x))
+        # This is the C helper on which collections.Counter relies. There is no need to presize the
+        # dict, because the cost of growing it is amortized over the insertions.
+        counts = {}
+        collections._count_elements(counts, self.process_text(x))  # type: ignore
+        return counts
+
+    def _iter_docs(self, X: typing.Union[pd.Series, pd.DataFrame]):
+        if self.on is None:
+            return iter(X)
+        return ({self.on: doc} for doc in X[self.on])
+
+    def fit_many(self, X: typing.Union[pd.Series, pd.DataFrame]) -> 'BagOfWords':
+        """Update with a mini-batch of documents.
+
+        `BagOfWords` is stateless, hence this does nothing.
+
+        Parameters:
+            X: A series of documents if `on` is `None`, else a dataframe which contains an `on`
+                column.
+
+        """
+        return self
+
+    def transform_many(self, X: typing.Union[pd.Series, pd.DataFrame]) -> pd.DataFrame:
+        """Transform a mini-batch of documents.
+
+        The documents are processed one after the other. The tokenizer holds the GIL, therefore
+        spreading the documents over threads wouldn't make this any faster.
+
+        Parameters:
+            X: A series of documents if `on` is `None`, else a dataframe which contains an `on`
+                column.
+
+        Returns:
+            A dataframe with one row per document and one column per token. Tokens that don't
+            occur in a document have a value of 0.
+
+        """
+        transform_one = self.transform_one
+        return pd.DataFrame(
+            [transform_one(x) for x in self._iter_docs(X)],
+            index=X.index,
+            dtype=float
+        ).fillna(0.)
 
 
 class TFIDF(BagOfWords):
@@ -265,7 +451,7 @@ class TFIDF(BagOfWords):
             `False`.
 
     Attributes:
-        dfs (collections.defaultdict): Document counts.
+        dfs (dict): Document counts.
         n (int): Number of scanned documents.
 
     Example:
@@ -317,33 +503,64 @@ class TFIDF(BagOfWords):
             ngram_range=ngram_range
         )
         self.normalize = normalize
-        self.dfs = collections.Counter()
+        self.dfs: typing.Dict[N_GRAM, int] = {}
         self.n = 0
 
     def fit_one(self, x):
 
         # Update the document counts
         terms = self.process_text(x)
-        self.dfs.update(set(terms))
+        collections._count_elements(self.dfs, set(terms))  # type: ignore
 
         # Increment the global document counter
         self.n += 1
 
         return self
 
+    def fit_many(self, X: typing.Union[pd.Series, pd.DataFrame]) -> 'TFIDF':
+        """Update the document counts with a mini-batch of documents.
+
+        Parameters:
+            X: A series of documents if `on` is `None`, else a dataframe which contains an `on`
+                column.
+
+        """
+
+        dfs = self.dfs
+        process_text = self.process_text
+        for x in self._iter_docs(X):
+            collections._count_elements(dfs, set(process_text(x)))  # type: ignore
+
+        self.n += len(X)
+
+        return self
+
     def transform_one(self, x):
 
         term_counts = super().transform_one(x)
         n_terms = sum(term_counts.values())
 
+        if not n_terms:
+            return {}
+
         tfidfs = {}
+        sq_sum = 0.
+        inv_n_terms = 1. / n_terms
+
+        # The IDF values are not cached, because fit_one usually changes the document counts
+        # between two calls to transform_one
+        n_docs = 1 + self.n
+        dfs = self.dfs
 
+        # The squared norm is accumulated in the same pass as the TF-IDF values
         for term, count in term_counts.items():
-            tf = count / n_terms
-            idf = math.log(((1 + self.n) / (1 + self.dfs[term]))) + 1
-            tfidfs[term] = tf * idf
+            idf = math.log(n_docs / (1 + dfs.get(term, 0))) + 1
+            tfidf = count * inv_n_terms * idf
+            tfidfs[term] = tfidf
+            sq_sum += tfidf * tfidf
 
         if self.normalize:
-            norm = math.sqrt(sum(tfidf ** 2 for tfidf in tfidfs.values()))
-            return {term: tfidf / norm for term, tfidf in tfidfs.items()}
+            inv_norm = 1. / math.sqrt(sq_sum)
+            for term in tfidfs:
+                tfidfs[term] *= inv_norm
         return tfidfs
@@ -13,7 +13,8 @@ class StatImputer(base.Transformer):
     This transformer allows you to replace missing values with the value of a running statistic.
     During a call to `fit_one`, for each feature, a statistic is updated whenever a numeric feature
     is observed. When `transform_one` is called, each feature with a `None` value is replaced with
-    the current value of the corresponding statistic.
+    the current value of the corresponding statistic. The features are only copied if at least one
+    value has to be imputed, otherwise `transform_one` returns the very same `dict` it was given.
 
     Parameters:
         imputers: A list of tuples where each tuple has two elements. The first elements is a
@@ -180,14 +181,17 @@ class StatImputer(base.Transformer):
 
     def transform_one(self, x):
 
-        # Transformers are supposed to be pure, therefore we make a copy of the features
-        x = x.copy()
+        # Transformers are supposed to be pure, therefore we make a copy of the features as soon as
+        # a value has to be imputed. If there is nothing to impute then x is returned as is.
+        imputed = x
 
-        for i in self.stats:
+        for i, stat in self.stats.items():
             if x[i] is None:
-                x[i] = self.stats[i].get()
+                if imputed is x:
+                    imputed = x.copy()
+                imputed[i] = stat.get()
 
-        return x
+        return imputed
 
 
 class Constant(stats.Univariate):
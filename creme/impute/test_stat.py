@@ -0,0 +1,21 @@
+from creme import impute
+from creme import stats
+
+
+def test_nothing_to_impute_returns_input():
+    imp = impute.StatImputer(('temperature', stats.Mean()))
+    x = {'temperature': 3, 'humidity': .5}
+    imp.fit_one(x)
+    assert imp.transform_one(x) is x
+
+
+def test_input_is_not_modified():
+    imp = impute.StatImputer(('temperature', stats.Mean()), ('weather', 'missing'))
+    for x in [{'temperature': 3, 'weather': 'sunny'}, {'temperature': 5, 'weather': 'rainy'}]:
+        imp.fit_one(x)
+
+    x = {'temperature': None, 'weather': None}
+    imputed = imp.transform_one(x)
+
+    assert imputed == {'temperature': 4., 'weather': 'missing'}
+    assert x == {'temperature': None, 'weather': None}
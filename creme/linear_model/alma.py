@@ -12,7 +12,7 @@ class ALMAClassifier(base.Classifier):
     """Approximate Large Margin Algorithm (ALMA).
 
     Parameters:
-        p
+        p: The order of the norm, which must be strictly greater than 1.
         alpha
         B
         C
@@ -47,6 +47,11 @@ class ALMAClassifier(base.Classifier):
     """
 
     def __init__(self, p=2, alpha=.9, B=1 / .9, C=2 ** .5):
+
+        # The step sizes are divided by sqrt(p - 1)
+        if p <= 1:
+            raise ValueError('p must be strictly greater than 1')
+
         self.p = p
         self.alpha = alpha
         self.B = B
@@ -54,8 +59,25 @@ class ALMAClassifier(base.Classifier):
         self.w = collections.defaultdict(float)
         self.k = 1
 
+        # The norm of w is maintained incrementally through the sum of |w_i|^p
+        self._w_pow_sum = 0.
+
+        # These don't change during training
+        self._B_sqrt_pm1 = B * math.sqrt(p - 1)
+        self._C_over_sqrt_pm1 = C / math.sqrt(p - 1)
+
+    def _set_w(self, i, wi):
+        old = self.w[i]
+        if self.p == 2:
+            self._w_pow_sum += wi * wi - old * old
+        else:
+            self._w_pow_sum += abs(wi) ** self.p - abs(old) ** self.p
+        self.w[i] = wi
+
     def _raw_dot(self, x):
-        return utils.math.dot(x, self.w)
+        # w is a defaultdict, and get doesn't insert missing features into it
+        w = self.w
+        return sum(xi * w.get(i, 0.) for i, xi in x.items())
 
     def predict_proba_one(self, x):
         yp = utils.math.sigmoid(self._raw_dot(x))
@@ -66,19 +88,24 @@ class ALMAClassifier(base.Classifier):
         # Convert 0 to -1
         y = int(y or -1)
 
-        gamma = self.B * math.sqrt(self.p - 1) / math.sqrt(self.k)
+        sqrt_k = math.sqrt(self.k)
+        gamma = self._B_sqrt_pm1 / sqrt_k
+
+        margin = y * self._raw_dot(x)
 
-        if y * self._raw_dot(x) < (1 - self.alpha) * gamma:
+        if margin < (1 - self.alpha) * gamma:
 
-            eta = self.C / (math.sqrt(self.p - 1) * math.sqrt(self.k))
+            eta = self._C_over_sqrt_pm1 / sqrt_k
 
             for i, xi in x.items():
-                self.w[i] += eta * y * xi
+                self._set_w(i, self.w[i] + eta * y * xi)
 
-            norm = utils.math.norm(self.w, order=self.p)
+            # Only the weights of the features in x have changed, hence the norm can be updated
+            # without going through all the weights
+            norm = max(0., self._w_pow_sum) ** (1 / self.p)
 
             for i in x:
-                self.w[i] /= max(1, norm)
+                self._set_w(i, self.w[i] / max(1, norm))
 
             self.k += 1
 
@@ -1,6 +1,10 @@
 import collections
+import collections.abc
 import copy
 import functools
+import typing
+
+import numpy as np
 
 from creme import base
 from creme import optim
@@ -10,13 +14,69 @@ from creme import utils
 __all__ = ['SoftmaxRegression']
 
 
+class _LabelWeights(collections.abc.MutableMapping):
+    """The weights of one label, viewed as a `dict` which maps features to weights.
+
+    The weights are stored in a row of the weight matrix of a `SoftmaxRegression`. This view is
+    what the `weights` property returns, so that the weights can be inspected and modified as if
+    they were a `dict`. Each access goes through a feature lookup and the matrix, which is too slow
+    for the optimizers' per-feature loops, hence `SoftmaxRegression.fit_one` gives the optimizers
+    plain `dict`s instead. A missing feature has a weight of 0, which is what a
+    `collections.defaultdict(float)` would return.
+
+    """
+
+    __slots__ = ('model', 'row')
+
+    def __init__(self, model: 'SoftmaxRegression', row: int):
+        self.model = model
+        self.row = row
+
+    def __getitem__(self, i):
+        model = self.model
+        col = model._features.get(i)
+        if col is None:
+            return 0.
+        # item returns a Python float, which is cheaper to create and to operate on
+        return model._W.item(self.row, col)
+
+    def __setitem__(self, i, wi):
+        model = self.model
+        col = model._features.get(i)
+        if col is None:
+            col = model._add_feature(i)
+        model._W[self.row, col] = wi
+
+    def __delitem__(self, i):
+        # The column of a feature is shared by every label, hence it is only zeroed out, which is
+        # the weight of a missing feature
+        col = self.model._features.get(i)
+        if col is not None:
+            self.model._W[self.row, col] = 0.
+
+    def __contains__(self, i):
+        return i in self.model._features
+
+    def __iter__(self):
+        return iter(self.model._features)
+
+    def __len__(self):
+        return len(self.model._features)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class SoftmaxRegression(base.Classifier):
     """Softmax regression is a generalization of logistic regression to multiple classes.
 
     Softmax regression is also known as "multinomial logistic regression". There are a set weights
-    for each class, hence the `weights` attribute is a nested `collections.defaultdict`. The main
-    advantage of using this instead of a one-vs-all logistic regression is that the probabilities
-    will be calibrated. Moreover softmax regression is more robust to outliers.
+    for each class, hence the `weights` attribute is a nested `dict`. The main advantage of using
+    this instead of a one-vs-all logistic regression is that the probabilities will be calibrated.
+    Moreover softmax regression is more robust to outliers.
+
+    The weights are stored in a matrix with one row per class. The scores of all the classes are
+    therefore obtained with a single matrix-vector product.
 
     Parameters:
         optimizer: The sequential optimizer used to tune the weights.
@@ -24,7 +84,7 @@ class SoftmaxRegression(base.Classifier):
         l2: Amount of L2 regularization used to push weights towards 0.
 
     Attributes:
-        weights (collections.defaultdict)
+        weights (dict): The weights of each class. The weights of a class can be modified in place.
 
     Example:
 
@@ -59,35 +119,141 @@ class SoftmaxRegression(base.Classifier):
         self.optimizers = collections.defaultdict(new_optimizer)  # type: ignore
         self.loss = optim.losses.CrossEntropy() if loss is None else loss
         self.l2 = l2
-        self.weights = collections.defaultdict(functools.partial(collections.defaultdict, float))  # type: ignore
+
+        # Plain SGD updates can be applied to all the labels at once
+        self._vectorized_sgd = type(optimizer) is optim.SGD
+
+        # Some optimizers move the weights before a prediction is made, which optim.Averager
+        # delegates to the optimizer it wraps
+        while isinstance(optimizer, optim.Averager):
+            optimizer = optimizer.optimizer
+        self._update_before_pred = (
+            type(optimizer).update_before_pred is not optim.Optimizer.update_before_pred
+        )
+
+        # The weight matrix is indexed by label and by feature. Its capacity is grown geometrically
+        # as new features arrive.
+        self._labels: typing.Dict[base.typing.ClfTarget, _LabelWeights] = {}
+        self._features: typing.Dict[base.typing.FeatureName, int] = {}
+        self._W = np.zeros((0, 0))
 
     @property
     def _multiclass(self):
         return True
 
+    @property
+    def weights(self):
+        # The views write through to the weight matrix, hence the weights can be modified in place
+        return dict(self._labels)
+
+    def _add_feature(self, i):
+        col = len(self._features)
+        if col == self._W.shape[1]:
+            W = np.zeros((self._W.shape[0], max(8, 2 * col)))
+            W[:, :col] = self._W
+            self._W = W
+        self._features[i] = col
+        return col
+
+    def _add_label(self, label):
+        weights = _LabelWeights(model=self, row=len(self._labels))
+        self._W = np.vstack((self._W, np.zeros(self._W.shape[1])))
+        self._labels[label] = weights
+        return weights
+
     def fit_one(self, x, y):
 
+        # Each feature is given a column beforehand, hence the weights of the features in x can be
+        # accessed as a block of the weight matrix. The optimizers are given plain dicts, which are
+        # much cheaper to access than the matrix. The weights of all the labels are read from the
+        # block and written back at once. A prediction only depends on the weights of the features
+        # in x, hence the other weights are left out, including for the optimizers which move the
+        # weights before a prediction and back afterwards.
+        cols = np.array([
+            self._features[i] if i in self._features else self._add_feature(i)
+            for i in x
+        ], dtype=int)
+        values = np.fromiter(x.values(), dtype=float, count=len(x))
+
         # Some optimizers need to do something before a prediction is made
-        for label, weights in self.weights.items():
-            self.optimizers[label].update_before_pred(w=weights)
+        if self._update_before_pred and self._labels:
+            W = self._W.take(cols, axis=1).tolist()
+            for label, w_row in zip(self._labels, W):
+                w = dict(zip(x, w_row))
+                self.optimizers[label].update_before_pred(w=w)
+                w_row[:] = [w.get(i, 0.) for i in x]
+            self._W[:, cols] = W
 
         # Make a prediction for the given features
-        y_pred = self.predict_proba_one(x)
+        scores = self._W.take(cols, axis=1) @ values
+        y_pred = utils.math.softmax(dict(zip(self._labels, scores.tolist())))
 
         # Compute the gradient of the loss w.r.t. each label
         loss_gradients = self.loss.gradient(y_true=y, y_pred=y_pred)
 
-        for label, loss in loss_gradients.items():
+        rows = [
+            self._labels[label].row if label in self._labels else self._add_label(label).row
+            for label in loss_gradients
+        ]
+
+        if self._vectorized_sgd:
+            return self._fit_sgd(values, loss_gradients, rows, cols)
+
+        # The gradient usually concerns every label, in which case the labels are processed in the
+        # order of the rows, which is cheaper than indexing the rows
+        if len(rows) == len(self._labels):
+            labels = self._labels
+            block = np.s_[:, cols]
+        else:
+            labels = loss_gradients
+            block = np.ix_(rows, cols)
+
+        l2 = self.l2
+        W = self._W[block].tolist()
+        for label, w_row in zip(labels, W):
 
             # Compute the gradient w.r.t. each feature
-            weights = self.weights[label]
-            gradient = {i: xi * loss + self.l2 * weights.get(i, 0) for i, xi in x.items()}
-            self.weights[label] = self.optimizers[label].update_after_pred(w=weights, g=gradient)
+            loss = loss_gradients[label]
+            gradient = {i: xi * loss + l2 * wi for (i, xi), wi in zip(x.items(), w_row)}
+
+            w = dict(zip(x, w_row))
+
+            # The weights are updated in place. A weight which is removed by the optimizer is null.
+            self.optimizers[label].update_after_pred(w=w, g=gradient)
+            w_row[:] = [w.get(i, 0.) for i in x]
+
+        self._W[block] = W
+
+        return self
+
+    def _fit_sgd(self, values, loss_gradients, rows, cols):
+
+        learning_rates = np.empty(len(rows))
+        for k, label in enumerate(loss_gradients):
+            optimizer = self.optimizers[label]
+            learning_rates[k] = optimizer.learning_rate
+            optimizer.n_iterations += 1
+
+        losses = np.fromiter(loss_gradients.values(), dtype=float, count=len(loss_gradients))
+
+        # The gradient of every label w.r.t. every feature is an outer product
+        block = np.ix_(rows, cols)
+        W = self._W[block]
+        gradient = np.outer(losses, values) + self.l2 * W
+        self._W[block] = W - learning_rates[:, np.newaxis] * gradient
 
         return self
 
     def predict_proba_one(self, x):
-        return utils.math.softmax({
-            label: utils.math.dot(weights, x)
-            for label, weights in self.weights.items()
-        })
+
+        cols, values = [], []
+        for i, xi in x.items():
+            col = self._features.get(i)
+            if col is not None:
+                cols.append(col)
+                values.append(xi)
+
+        # The scores of all the labels are obtained with one matrix-vector product
+        scores = self._W[:, cols] @ np.asarray(values, dtype=float)
+
+        return utils.math.softmax(dict(zip(self._labels, scores.tolist())))
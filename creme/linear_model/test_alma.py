@@ -0,0 +1,48 @@
+import collections
+import itertools
+import math
+
+import pytest
+
+from creme import datasets
+from creme import linear_model as lm
+from creme import preprocessing
+from creme import utils
+
+
+def test_p_must_exceed_1():
+    with pytest.raises(ValueError):
+        lm.ALMAClassifier(p=1)
+
+
+@pytest.mark.parametrize('p', [2, 3, 1.5])
+def test_matches_full_norm(p):
+    """Checks that maintaining the norm incrementally produces the same weights as recomputing it
+    from all the weights at each step."""
+
+    scaler = preprocessing.StandardScaler()
+    model = lm.ALMAClassifier(p=p)
+    alpha, B, C = model.alpha, model.B, model.C
+    w = collections.defaultdict(float)
+    k = 1
+
+    for x, y in itertools.islice(datasets.Phishing(), 500):
+        x = scaler.fit_one(x).transform_one(x)
+
+        # Reference implementation
+        y_ = int(y or -1)
+        gamma = B * math.sqrt(p - 1) / math.sqrt(k)
+        if y_ * utils.math.dot(x, w) < (1 - alpha) * gamma:
+            eta = C / (math.sqrt(p - 1) * math.sqrt(k))
+            for i, xi in x.items():
+                w[i] += eta * y_ * xi
+            norm = utils.math.norm(w, order=p)
+            for i in x:
+                w[i] /= max(1, norm)
+            k += 1
+
+        model.fit_one(x, y)
+
+    assert model.k == k
+    for i, wi in w.items():
+        assert math.isclose(model.w[i], wi, rel_tol=1e-6, abs_tol=1e-9)
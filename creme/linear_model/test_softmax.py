@@ -0,0 +1,166 @@
+import collections
+import copy
+import functools
+import itertools
+import math
+
+import pytest
+
+from creme import datasets
+from creme import linear_model as lm
+from creme import metrics
+from creme import optim
+from creme import preprocessing
+from creme import utils
+
+
+@pytest.mark.parametrize(
+    'optimizer',
+    [
+        pytest.param(copy.deepcopy(optimizer), id=str(optimizer))
+        for optimizer in [
+            optim.AdaBound(),
+            optim.AdaDelta(),
+            optim.AdaGrad(),
+            optim.AdaMax(),
+            optim.Adam(),
+            optim.AMSGrad(),
+            optim.Averager(optim.SGD()),
+            optim.FTRLProximal(),
+            optim.Momentum(),
+            optim.Nadam(),
+            optim.NesterovMomentum(),
+            optim.RMSProp(),
+            optim.SGD()
+        ]
+    ]
+)
+def test_optimizers(optimizer):
+    """Checks that each optimizer can be used to train a softmax regression."""
+
+    scaler = preprocessing.StandardScaler()
+    model = lm.SoftmaxRegression(optimizer=optimizer)
+    metric = metrics.CrossEntropy()
+
+    for x, y in itertools.islice(datasets.ImageSegments(), 300):
+        x = scaler.fit_one(x).transform_one(x)
+        metric.update(y, model.predict_proba_one(x))
+        model.fit_one(x, y)
+
+    assert math.isfinite(metric.get())
+
+
+def test_averager_leaves_weights_untouched():
+    """Checks that the weights averaged by optim.Averager are not written back into the model.
+
+    The weights are updated in place, hence wrapping SGD with an Averager produces the same
+    weights as plain SGD, which is also the case with linear_model.LogisticRegression.
+
+    """
+
+    scaler = preprocessing.StandardScaler()
+    sgd = lm.SoftmaxRegression(optimizer=optim.SGD(.01), l2=.01)
+    avg = lm.SoftmaxRegression(optimizer=optim.Averager(optim.SGD(.01)), l2=.01)
+
+    for x, y in itertools.islice(datasets.ImageSegments(), 300):
+        x = scaler.fit_one(x).transform_one(x)
+        sgd.fit_one(x, y)
+        avg.fit_one(x, y)
+
+    for label, weights in sgd.weights.items():
+        for i, wi in weights.items():
+            assert math.isclose(wi, avg.weights[label][i])
+
+
+def test_weights_are_mutable():
+    """Checks that modifying the weights of a label modifies the model."""
+
+    model = lm.SoftmaxRegression()
+    x = {'a': 1., 'b': 2.}
+    model.fit_one(x, 'foo')
+    model.fit_one(x, 'bar')
+
+    model.weights['foo']['a'] = 10.
+    assert model.weights['foo']['a'] == 10.
+    assert model.predict_proba_one(x)['foo'] > .99
+
+
+def test_sgd_matches_dict_path():
+    """Checks that the vectorized SGD update matches the update applied one label at a time."""
+
+    scaler = preprocessing.StandardScaler()
+    fast = lm.SoftmaxRegression(optimizer=optim.SGD(.01), l2=.01)
+    slow = lm.SoftmaxRegression(optimizer=optim.SGD(.01), l2=.01)
+    slow._vectorized_sgd = False
+    assert fast._vectorized_sgd
+
+    for x, y in itertools.islice(datasets.ImageSegments(), 300):
+        x = scaler.fit_one(x).transform_one(x)
+        fast.fit_one(x, y)
+        slow.fit_one(x, y)
+
+        for label, p in fast.predict_proba_one(x).items():
+            assert math.isclose(p, slow.predict_proba_one(x)[label], rel_tol=1e-9)
+
+
+@pytest.mark.parametrize(
+    'optimizer',
+    [
+        pytest.param(optimizer, id=str(optimizer))
+        for optimizer in [
+            optim.SGD(.01),
+            optim.Adam(),
+            optim.Averager(optim.SGD(.01)),
+            optim.FTRLProximal(),
+            optim.NesterovMomentum(.01)
+        ]
+    ]
+)
+def test_matches_nested_dicts(optimizer):
+    """Checks that the weight matrix produces the same results as weights stored in dicts."""
+
+    scaler = preprocessing.StandardScaler()
+    model = lm.SoftmaxRegression(optimizer=copy.deepcopy(optimizer), l2=.01)
+    loss = optim.losses.CrossEntropy()
+    weights = collections.defaultdict(functools.partial(collections.defaultdict, float))
+    optimizers = collections.defaultdict(functools.partial(copy.deepcopy, optimizer))
+
+    for x, y in itertools.islice(datasets.ImageSegments(), 300):
+        x = scaler.fit_one(x).transform_one(x)
+
+        # Reference implementation, which stores all the weights of each label in a dict
+        for label, w in weights.items():
+            optimizers[label].update_before_pred(w=w)
+        y_pred = utils.math.softmax({
+            label: utils.math.dot(w, x)
+            for label, w in weights.items()
+        })
+        for label, g in loss.gradient(y_true=y, y_pred=y_pred).items():
+            w = weights[label]
+            gradient = {i: xi * g + .01 * w.get(i, 0.) for i, xi in x.items()}
+            optimizers[label].update_after_pred(w=w, g=gradient)
+
+        model.fit_one(x, y)
+
+    assert model.weights.keys() == weights.keys()
+    for label, w in weights.items():
+        for i in model.weights[label]:
+            assert math.isclose(model.weights[label][i], w.get(i, 0.), rel_tol=1e-9, abs_tol=1e-12)
+
+
+def test_optimizers_are_given_dicts():
+    """Checks that the optimizers update plain dicts, which are cheaper than the weight views."""
+
+    class CheckedAdam(optim.Adam):
+
+        def update_before_pred(self, w):
+            assert type(w) is dict
+            return super().update_before_pred(w)
+
+        def _update_after_pred(self, w, g):
+            assert type(w) is dict
+            return super()._update_after_pred(w, g)
+
+    model = lm.SoftmaxRegression(optimizer=CheckedAdam())
+    for x, y in itertools.islice(datasets.ImageSegments(), 10):
+        model.fit_one(x, y)
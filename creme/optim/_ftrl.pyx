@@ -0,0 +1,54 @@
+cimport cython
+from cpython cimport array
+from libc.math cimport copysign, fabs, sqrt
+
+
+@cython.cdivision(True)
+def update(w, g, dict index, array.array z, array.array n,
+           double alpha, double beta, double l1, double l2):
+    """Applies one FTRL-Proximal step to the weights and to the state of each feature.
+
+    The state of a feature is stored in `z` and `n` at the position given by `index`. New features
+    are appended to the arrays. The state is updated in place, one feature at a time, hence no
+    temporary array is allocated.
+
+    """
+
+    cdef Py_ssize_t k
+    cdef double gi, zi, ni, sqrt_ni, new_ni, wi
+
+    # These don't depend on the feature
+    cdef double inv_alpha = 1. / alpha
+    cdef double beta_over_alpha_plus_l2 = beta * inv_alpha + l2
+
+    for i, gi in g.items():
+
+        pos = index.get(i)
+        if pos is None:
+            # The state of a new feature is null, and so is its weight, hence a null gradient
+            # leaves everything untouched
+            if gi == 0.:
+                continue
+            pos = index[i] = len(z)
+            z.append(0.)
+            n.append(0.)
+        k = pos
+
+        zi = z.data.as_doubles[k]
+        ni = n.data.as_doubles[k]
+        sqrt_ni = sqrt(ni)
+
+        new_ni = ni + gi * gi
+        n.data.as_doubles[k] = new_ni
+
+        # The weight is null as long as |z| doesn't exceed l1, in which case there is no need to
+        # look it up in order to update z
+        if fabs(zi) > l1:
+            wi = (copysign(l1, zi) - zi) / (beta_over_alpha_plus_l2 + sqrt_ni * inv_alpha)
+            w[i] = wi
+            z.data.as_doubles[k] = zi + gi - (sqrt(new_ni) - sqrt_ni) * inv_alpha * wi
+        else:
+            w.pop(i, None)
+            z.data.as_doubles[k] = zi + gi
+
+    return w
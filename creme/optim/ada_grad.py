@@ -48,8 +48,14 @@ class AdaGrad(base.Optimizer):
 
     def _update_after_pred(self, w, g):
 
+        # The learning rate doesn't depend on the feature, so it is only computed once
+        lr = self.learning_rate
+        eps = self.eps
+        g2 = self.g2
+
         for i, gi in g.items():
-            self.g2[i] += gi ** 2
-            w[i] -= self.learning_rate / (self.g2[i] + self.eps) ** 0.5 * gi
+            g2i = g2[i] + gi * gi
+            g2[i] = g2i
+            w[i] -= lr / (g2i + eps) ** 0.5 * gi
 
         return w
@@ -1,16 +1,69 @@
-import collections
-
-import numpy as np
+import array
+import collections.abc
 
 from . import base
+from . import _ftrl
 
 
 __all__ = ['FTRLProximal']
 
 
+class _StateView(collections.abc.MutableMapping):
+    """Part of the state of an `FTRLProximal`, viewed as a `dict` which maps features to values.
+
+    The values are stored in one of the flat arrays of the optimizer. A missing feature has a value
+    of 0, which is what a `collections.defaultdict(float)` would return, and is also the state of a
+    feature which hasn't been seen yet.
+
+    """
+
+    __slots__ = ('optimizer', 'name')
+
+    def __init__(self, optimizer: 'FTRLProximal', name: str):
+        self.optimizer = optimizer
+        self.name = name
+
+    def __getitem__(self, i):
+        pos = self.optimizer._index.get(i)
+        if pos is None:
+            return 0.
+        return getattr(self.optimizer, self.name)[pos]
+
+    def __setitem__(self, i, value):
+        optimizer = self.optimizer
+        pos = optimizer._index.get(i)
+        if pos is None:
+            # z and n are aligned, hence a new feature gets a position in both
+            pos = optimizer._index[i] = len(optimizer._z)
+            optimizer._z.append(0.)
+            optimizer._n.append(0.)
+        getattr(optimizer, self.name)[pos] = value
+
+    def __delitem__(self, i):
+        # The position of a feature is shared by z and n, hence the value is only reset to 0
+        pos = self.optimizer._index.get(i)
+        if pos is not None:
+            getattr(self.optimizer, self.name)[pos] = 0.
+
+    def __contains__(self, i):
+        return i in self.optimizer._index
+
+    def __iter__(self):
+        return iter(self.optimizer._index)
+
+    def __len__(self):
+        return len(self.optimizer._index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class FTRLProximal(base.Optimizer):
     """FTRL-Proximal optimizer.
 
+    The state of each feature is stored at the feature's position in flat arrays of doubles, which
+    take up much less memory than `dict`s of floats when there are many features.
+
     Parameters:
         alpha
         beta
@@ -18,8 +71,8 @@ class FTRLProximal(base.Optimizer):
         l2
 
     Attributes:
-        z (collections.defaultdict)
-        n (collections.defaultdict)
+        z (dict): A view over the `z` value of each feature, which can be modified in place.
+        n (dict): A view over the `n` value of each feature, which can be modified in place.
 
     Example:
 
@@ -52,26 +105,25 @@ class FTRLProximal(base.Optimizer):
         self.beta = beta
         self.l1 = l1
         self.l2 = l2
-        self.z = collections.defaultdict(float)
-        self.n = collections.defaultdict(float)
         self.n_iterations = 0
 
-    def _update_after_pred(self, w, g):
-
-        alpha = self.alpha
-        beta = self.beta
-        l1 = self.l1
-        l2 = self.l2
-        z = self.z
-        n = self.n
+        self._index = {}
+        self._z = array.array('d')
+        self._n = array.array('d')
 
-        for i in g:
-            if abs(z[i]) > l1:
-                w[i] = -((beta + n[i] ** 0.5) / alpha + l2) ** -1 * (z[i] - np.sign(z[i]) * l1)
+    @property
+    def z(self):
+        return _StateView(self, '_z')
 
-        for i, gi in g.items():
-            s = ((self.n[i] + gi ** 2) ** 0.5 - self.n[i] ** 0.5) / self.alpha
-            self.z[i] += gi - s * w.get(i, 0)
-            self.n[i] += gi ** 2
+    @property
+    def n(self):
+        return _StateView(self, '_n')
 
-        return w
+    def _update_after_pred(self, w, g):
+        # The loop over the features is compiled, see _ftrl.pyx. Vectorizing the update with numpy
+        # is slower whatever the number of features, because the features still have to be looked
+        # up and the weights written one by one from Python.
+        return _ftrl.update(
+            w, g, self._index, self._z, self._n,
+            self.alpha, self.beta, self.l1, self.l2
+        )
@@ -0,0 +1,74 @@
+import math
+import random
+
+import pytest
+
+from creme import optim
+
+
+def reference_update(w, g, z, n, alpha, beta, l1, l2):
+    """FTRL-Proximal update written in pure Python, with the state stored in dicts."""
+
+    for i, gi in g.items():
+
+        zi = z.get(i, 0.)
+        ni = n.get(i, 0.)
+
+        if abs(zi) > l1:
+            wi = -(zi - math.copysign(l1, zi)) / ((beta + math.sqrt(ni)) / alpha + l2)
+            w[i] = wi
+        else:
+            wi = 0.
+            w.pop(i, None)
+
+        z[i] = zi + gi - (math.sqrt(ni + gi ** 2) - math.sqrt(ni)) / alpha * wi
+        n[i] = ni + gi ** 2
+
+    return w
+
+
+@pytest.mark.parametrize('l1', [0., .1, 1.])
+def test_kernel_matches_reference(l1):
+
+    rng = random.Random(42)
+    params = dict(alpha=.05, beta=1., l1=l1, l2=1.)
+    optimizer = optim.FTRLProximal(**params)
+    w, w_ref, z_ref, n_ref = {}, {}, {}, {}
+    features = [f'x{i}' for i in range(20)]
+
+    for _ in range(500):
+
+        # Sparse gradients, which sometimes contain zeros and new features
+        g = {
+            i: 0. if rng.random() < .1 else rng.gauss(0, 1)
+            for i in rng.sample(features, rng.randint(0, len(features)))
+        }
+
+        w = optimizer.update_after_pred(w=w, g=g)
+        w_ref = reference_update(w_ref, g, z_ref, n_ref, **params)
+
+        assert w.keys() == w_ref.keys()
+        for i, wi in w_ref.items():
+            assert math.isclose(w[i], wi, rel_tol=1e-12, abs_tol=1e-12)
+
+    z, n = optimizer.z, optimizer.n
+    for i in features:
+        assert math.isclose(z.get(i, 0.), z_ref.get(i, 0.), rel_tol=1e-12, abs_tol=1e-12)
+        assert math.isclose(n.get(i, 0.), n_ref.get(i, 0.), rel_tol=1e-12, abs_tol=1e-12)
+
+
+def test_state_is_mutable():
+    """Checks that modifying z and n modifies the state of the optimizer."""
+
+    optimizer = optim.FTRLProximal(alpha=1., beta=0., l1=0., l2=0.)
+    optimizer.update_after_pred(w={}, g={'a': 1.})
+
+    optimizer.z['a'] = 2.
+    optimizer.n['b'] = 4.
+    assert optimizer.z['a'] == 2.
+    assert optimizer.n['b'] == 4.
+    assert optimizer.z['b'] == 0.
+
+    # The weight of a is -z / sqrt(n)
+    w = optimizer.update_after_pred(w={}, g={'a': 0.})
+    assert w == {'a': -2.}